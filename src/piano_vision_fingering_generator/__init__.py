@@ -1,4 +1,9 @@
+import atexit
 import logging
+import logging.handlers
+import queue
+import re
+import sys
 from typing import Union
 
 import tqdm
@@ -39,12 +44,15 @@ from piano_vision_fingering_generator.models import (
     Tempo,
 )
 
+# Messages matching this dump as unquoted single-line YAML scalars, so the INFO
+# record can be written directly instead of going through yaml.safe_dump.
+_PLAIN_YAML_MESSAGE = re.compile(
+    r"[A-Za-z](?:[A-Za-z0-9 _.,()/-]{0,58}[A-Za-z0-9_.,()/-])?"
+)
+_YAML_RESERVED_WORDS = frozenset({"yes", "no", "true", "false", "on", "off", "null"})
 
-class YAMLformatter(logging.Formatter):
-    def __init__(self, *arg, **kwargs) -> None:
-        yaml.SafeDumper.add_representer(str, self.str_representer)
-        super().__init__(*arg, **kwargs)
 
+class YAMLformatter(logging.Formatter):
     COLORS = {
         "DEBUG": "\033[95m",  # Purple
         "INFO": "\033[92m",  # Green
@@ -54,13 +62,30 @@ class YAMLformatter(logging.Formatter):
     }
     RESET = "\033[0m"  # Reset color
 
-    def str_representer(self, dumper, data):
+    @staticmethod
+    def str_representer(dumper, data):
         # Use block style if the string contains new lines, otherwise use the default
         if "\n" in data:
             return dumper.represent_scalar("tag:yaml.org,2002:str", data, style="|")
         return dumper.represent_scalar("tag:yaml.org,2002:str", data)
 
+    def _is_plain_info_record(self, message: str) -> bool:
+        return (
+            self.datefmt is None
+            and _PLAIN_YAML_MESSAGE.fullmatch(message) is not None
+            and message.lower() not in _YAML_RESERVED_WORDS
+        )
+
     def format(self, record):
+        if record.levelno == logging.INFO:
+            message = record.getMessage()
+            if self._is_plain_info_record(message):
+                return (
+                    f"{self.COLORS['INFO']}level: INFO\n"
+                    f"timestamp: {self.formatTime(record)}\n"
+                    f"message: {message}\n{self.RESET}"
+                )
+
         if record.levelno != logging.INFO:
             log_record = {
                 "level": record.levelname,
@@ -87,6 +112,9 @@ class YAMLformatter(logging.Formatter):
         return msg
 
 
+yaml.SafeDumper.add_representer(str, YAMLformatter.str_representer)
+
+
 class TqdmLoggingHandler(logging.Handler):
     def __init__(self, level=logging.NOTSET):
         super().__init__(level)
@@ -95,19 +123,39 @@ class TqdmLoggingHandler(logging.Handler):
     def emit(self, record: logging.LogRecord) -> None:
         try:
             msg = self.format(record)
-            tqdm.tqdm.write(msg)
+            tqdm.tqdm.write(msg, file=sys.stderr)
             self.flush()
         except Exception:
             self.handleError(record)
 
 
-logging.basicConfig(
-    level=logging.INFO,
-)
-for handler in logging.getLogger().handlers:
-    handler.setFormatter(YAMLformatter())
-
-logging.getLogger("piano_vision_fingering_generator").setLevel(logging.INFO)
+# Records are formatted and written on a background thread so that logging
+# from the builders is only a queue put on the calling thread.
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_handler = logging.handlers.QueueHandler(_log_queue)
+_log_listener = logging.handlers.QueueListener(_log_queue, TqdmLoggingHandler())
+_package_logger = logging.getLogger("piano_vision_fingering_generator")
+_package_logger.setLevel(logging.INFO)
+# Like logging.basicConfig, leave logging alone if the application set it up.
+# While the package writes its own records they are not propagated, so an
+# application configuring the root logger later doesn't print them twice.
+if not logging.getLogger().handlers:
+    _package_logger.addHandler(_log_handler)
+    _package_logger.propagate = False
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
+
+def _log_without_listener() -> None:
+    """
+    Writes the package's records directly instead of through the queue. Used in
+    worker processes, where the listener thread is not running.
+    """
+    if _log_handler not in _package_logger.handlers:
+        return
+    _package_logger.removeHandler(_log_handler)
+    for handler in _log_listener.handlers:
+        _package_logger.addHandler(handler)
 
 
 def set_logging_level(level: Union[int, str]) -> None:
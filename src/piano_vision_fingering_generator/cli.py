@@ -5,6 +5,8 @@ from piano_vision_fingering_generator import set_logging_level
 from piano_vision_fingering_generator.constants import HandSize
 from piano_vision_fingering_generator.io import build_and_save_piano_vision_json
 
+_HAND_SIZE_CHOICES = tuple(h.value for h in HandSize)
+
 
 def build_cli() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Piano Vision Fingering Generator")
@@ -12,7 +14,7 @@ def build_cli() -> argparse.ArgumentParser:
     parser.add_argument(
         "hand_size",
         type=HandSize,
-        choices=[h.value for h in HandSize],
+        choices=_HAND_SIZE_CHOICES,
         help="Hand size for the generated fingering",
     )
     parser.add_argument(
@@ -1,5 +1,7 @@
+import bisect
 import os
 from enum import Enum, StrEnum
+from functools import lru_cache
 from pathlib import Path
 from typing import Final, Union
 
@@ -42,6 +44,19 @@ COMMON_DURATIONS: Final = [
 ]
 
 DURATION_MAP: Final = {float(d.quarterLength): d for d in COMMON_DURATIONS}
+_SORTED_DURATION_KEYS: Final = sorted(DURATION_MAP)
+# Ties between two equally close durations go to the one listed first in
+# COMMON_DURATIONS, matching a linear min() over DURATION_MAP.
+_DURATION_KEY_RANK: Final = {key: rank for rank, key in enumerate(DURATION_MAP)}
+
+
+def _nearest_common_duration(quarter_length: float) -> m21.duration.Duration:
+    index = bisect.bisect_left(_SORTED_DURATION_KEYS, quarter_length)
+    neighbours = _SORTED_DURATION_KEYS[max(index - 1, 0) : index + 1]
+    closest_duration = min(
+        neighbours, key=lambda x: (abs(x - quarter_length), _DURATION_KEY_RANK[x])
+    )
+    return DURATION_MAP[closest_duration]
 
 
 def round_duration_to_nearest(
@@ -50,10 +65,7 @@ def round_duration_to_nearest(
     """
     Rounds a duration to the nearest music21 duration.
     """
-    closest_duration = min(
-        DURATION_MAP.keys(), key=lambda x: abs(x - float(duration.quarterLength))
-    )
-    matched_duration = DURATION_MAP[closest_duration]
+    matched_duration = _nearest_common_duration(float(duration.quarterLength))
     rounded_duration = m21.duration.Duration(
         type=matched_duration.type, dots=matched_duration.dots
     )
@@ -80,23 +92,38 @@ class NoteLengthType(StrEnum):
 
     @classmethod
     def from_duration(cls, value: m21.duration.Duration) -> "NoteLengthType":
-        name = value.type
-        if name in ORDINAL_NUMBERS_TO_WORDS:
-            name = ORDINAL_NUMBERS_TO_WORDS[name]
-
-        if value.dots > 0:
-            name = "dotted" + value.type
-        if name in [v.value for v in cls.__members__.values()]:
-            return cls(name)
-
-        # no matches, get the closest match
-        closest = round_duration_to_nearest(value)
-        name = closest.type
-        if name in ORDINAL_NUMBERS_TO_WORDS:
-            name = ORDINAL_NUMBERS_TO_WORDS[name]
-        if closest.dots > 0:
-            name = "dotted" + name
-        return cls(name)
+        return _note_length_type_from_key(value.type, value.dots, value.quarterLength)
+
+
+_NOTE_LENGTH_TYPE_NAMES: Final = frozenset(NoteLengthType._value2member_map_)
+
+
+@lru_cache(maxsize=128)
+def _note_length_type_from_key(
+    duration_type: str, dots: int, quarter_length: m21.common.OffsetQL
+) -> NoteLengthType:
+    """
+    Resolves a NoteLengthType from the parts of a duration it depends on.
+
+    A song only uses a handful of distinct durations, so the result is cached.
+    """
+    name = duration_type
+    if name in ORDINAL_NUMBERS_TO_WORDS:
+        name = ORDINAL_NUMBERS_TO_WORDS[name]
+
+    if dots > 0:
+        name = "dotted" + duration_type
+    if name in _NOTE_LENGTH_TYPE_NAMES:
+        return NoteLengthType(name)
+
+    # no matches, get the closest match
+    closest = _nearest_common_duration(float(quarter_length))
+    name = closest.type
+    if name in ORDINAL_NUMBERS_TO_WORDS:
+        name = ORDINAL_NUMBERS_TO_WORDS[name]
+    if closest.dots > 0:
+        name = "dotted" + name
+    return NoteLengthType(name)
 
 
 class TimeSignature(Enum):
@@ -1,10 +1,12 @@
+import bisect
 import logging
 import multiprocessing
 import multiprocessing.pool
+import struct
 from dataclasses import InitVar, dataclass, field
 from functools import cached_property
 from pathlib import Path
-from typing import Any, Optional, cast
+from typing import Any, Callable, Final, Optional, cast
 
 import music21 as m21
 import pianoplayer
@@ -41,6 +43,8 @@ from piano_vision_fingering_generator.models import (
 
 logger = logging.getLogger(__name__)
 
+_HAND_ABBREVIATIONS: Final = {Hand.RIGHT: "r", Hand.LEFT: "l"}
+
 
 @dataclass
 class SongPartMixin:
@@ -48,7 +52,7 @@ class SongPartMixin:
     right_hand_part_index: Optional[int] = None
     left_hand_part_index: Optional[int] = None
 
-    @property
+    @cached_property
     def right_hand_part(self) -> m21.stream.Part:
         if self.right_hand_part_index is None:
             self._find_part_index()
@@ -58,7 +62,7 @@ class SongPartMixin:
             raise ValueError("No music21 song found")
         return self.m21_song.parts[self.right_hand_part_index]
 
-    @property
+    @cached_property
     def left_hand_part(self) -> m21.stream.Part:
         if self.left_hand_part_index is None:
             self._find_part_index()
@@ -68,19 +72,28 @@ class SongPartMixin:
             raise ValueError("No music21 song found")
         return self.m21_song.parts[self.left_hand_part_index]
 
+    @staticmethod
+    def _measures_by_number(part: m21.stream.Part) -> dict[int, m21.stream.Measure]:
+        """
+        Indexes the measures of a part by number in a single pass.
+
+        Like ``part.measure(number)``, the first measure with a number wins.
+        """
+        measures: dict[int, m21.stream.Measure] = {}
+        for measure in part.getElementsByClass(m21.stream.Measure):
+            measures.setdefault(measure.number, measure)
+        return measures
+
     def _find_part_index(self):
         if self.m21_song is None:
             raise ValueError("No music21 song found")
+        treble_clef, bass_clef = self._find_first_treble_and_bass_clefs()
+        part_indices = {id(part): i for i, part in enumerate(self.m21_song.parts)}
         if self.right_hand_part_index is None:
             try:
-                treble_clef = (
-                    self.m21_song.recurse()
-                    .getElementsByClass(m21.clef.TrebleClef)
-                    .first()
-                )
                 treble_clef = cast(m21.clef.TrebleClef, treble_clef)
                 rh_part = treble_clef.getContextByClass(m21.stream.Part)
-                rh_index = self.m21_song.parts.parts.index(rh_part)
+                rh_index = part_indices[id(rh_part)]
                 self.right_hand_part_index = rh_index
                 logger.info(f"Right hand part index found: {rh_index}")
             except Exception as e:
@@ -90,14 +103,9 @@ class SongPartMixin:
                 self.right_hand_part_index = 0
         if self.left_hand_part_index is None:
             try:
-                bass_clef = (
-                    self.m21_song.recurse()
-                    .getElementsByClass(m21.clef.BassClef)
-                    .first()
-                )
                 bass_clef = cast(m21.clef.BassClef, bass_clef)
                 lh_part = bass_clef.getContextByClass(m21.stream.Part)
-                lh_index = self.m21_song.parts.parts.index(lh_part)
+                lh_index = part_indices[id(lh_part)]
                 self.left_hand_part_index = lh_index
                 logger.info(f"Left hand part index found: {lh_index}")
             except Exception as e:
@@ -106,6 +114,30 @@ class SongPartMixin:
                 )
                 self.left_hand_part_index = 1
 
+    def _find_first_treble_and_bass_clefs(
+        self,
+    ) -> tuple[Optional[m21.clef.TrebleClef], Optional[m21.clef.BassClef]]:
+        """
+        Finds the first treble and bass clef of the song in a single recursion,
+        stopping as soon as every clef that is still needed has been seen.
+        """
+        if self.m21_song is None:
+            raise ValueError("No music21 song found")
+        treble_clef: Optional[m21.clef.TrebleClef] = None
+        bass_clef: Optional[m21.clef.BassClef] = None
+        need_treble = self.right_hand_part_index is None
+        need_bass = self.left_hand_part_index is None
+        for clef in self.m21_song.recurse().getElementsByClass(m21.clef.Clef):
+            if need_treble and isinstance(clef, m21.clef.TrebleClef):
+                treble_clef = clef
+                need_treble = False
+            elif need_bass and isinstance(clef, m21.clef.BassClef):
+                bass_clef = clef
+                need_bass = False
+            if not need_treble and not need_bass:
+                break
+        return treble_clef, bass_clef
+
 
 @dataclass
 class SongTimeSignatureFixer(SongPartMixin):
@@ -161,24 +193,30 @@ class SongTimeSignatureFixer(SongPartMixin):
     def change_time_signature_for_part(
         self, target_part: m21.stream.Part, source_part: m21.stream.Part
     ) -> None:
-        source_part_measures_count = len(source_part.measures(0, None))
-        original_target_part_measures_count = len(target_part.measures(0, None))
+        source_part_measures_count = len(
+            source_part.getElementsByClass(m21.stream.Measure)
+        )
+        original_target_part_measures_count = len(
+            target_part.getElementsByClass(m21.stream.Measure)
+        )
 
         for ts in source_part.getTimeSignatures():
             target_part.insert(ts.offset, ts)
+        # Both parts are re-measured once; copying the metronome marks keeps the
+        # measures intact, only dropping the final measure needs a re-measure.
         target_part.makeMeasures(inPlace=True)
         source_part.makeMeasures(inPlace=True)
 
-        new_target_part_measures_count = len(target_part.measures(0, None))
+        new_target_part_measures_count = len(
+            target_part.getElementsByClass(m21.stream.Measure)
+        )
         self.align_bpms(target_part, source_part)
-        target_part.makeMeasures(inPlace=True)
-        source_part.makeMeasures(inPlace=True)
         if new_target_part_measures_count != source_part_measures_count:
             self.try_remove_final_measure(target_part)
-            new_target_part_measures_count = len(target_part.measures(0, None))
-        # self.m21_song.makeMeasures(inPlace=True)
-        target_part.makeMeasures(inPlace=True)
-        source_part.makeMeasures(inPlace=True)
+            new_target_part_measures_count = len(
+                target_part.getElementsByClass(m21.stream.Measure)
+            )
+            target_part.makeMeasures(inPlace=True)
         logger.info(
             (
                 f"source measure count: {source_part_measures_count}\n"
@@ -188,7 +226,7 @@ class SongTimeSignatureFixer(SongPartMixin):
         )
 
     def try_remove_final_measure(self, part: m21.stream.Part):
-        last_measure = part.measure(-1)
+        last_measure = part.getElementsByClass(m21.stream.Measure).last()
         if not last_measure:
             raise ValueError("No last measure found")
         if not all(el.isRest for el in last_measure.notesAndRests):
@@ -202,8 +240,9 @@ class SongTimeSignatureFixer(SongPartMixin):
     def align_bpms(
         self, target_part: m21.stream.Part, source_part: m21.stream.Part
     ) -> None:
-        for measure in source_part.measures(0, None):
-            target_measure = target_part.measure(measure.measureNumber)
+        target_measures = self._measures_by_number(target_part)
+        for measure in source_part.getElementsByClass(m21.stream.Measure):
+            target_measure = target_measures.get(measure.measureNumber)
             if not target_measure:
                 raise ValueError(
                     (
@@ -214,37 +253,41 @@ class SongTimeSignatureFixer(SongPartMixin):
             for metronome in measure.getElementsByClass(m21.tempo.MetronomeMark):
                 target_measure.insert(metronome.offset, metronome)
 
-    def align_durations(
-        self, target_part: m21.stream.Part, source_part: m21.stream.Part
-    ):
-        for measure in source_part.measures(0, None):
-            target_measure = target_part.measure(measure.measureNumber)
-            if not target_measure:
-                raise ValueError(f"No measure {measure.measureNumber} found")
-
 
 @dataclass
 class MetronomeGetterMixin(SongPartMixin):
-    right_hand_metronomes: list["MetronomeWithBoundaries"] = field(
-        default_factory=list, init=False
+    right_hand_metronomes: Optional[list["MetronomeWithBoundaries"]] = field(
+        default=None, kw_only=True
     )
-    left_hand_metronomes: list["MetronomeWithBoundaries"] = field(
-        default_factory=list, init=False
+    left_hand_metronomes: Optional[list["MetronomeWithBoundaries"]] = field(
+        default=None, kw_only=True
     )
+    _right_hand_lower_bounds: list[float] = field(default_factory=list, init=False)
+    _left_hand_lower_bounds: list[float] = field(default_factory=list, init=False)
 
     def __post_init__(self):
-        for metronome_data in self.right_hand_part.metronomeMarkBoundaries():
-            self.right_hand_metronomes.append(
-                MetronomeWithBoundaries(
-                    metronome_data[2], metronome_data[0], metronome_data[1]
-                )
-            )
-        for metronome_data in self.left_hand_part.metronomeMarkBoundaries():
-            self.left_hand_metronomes.append(
-                MetronomeWithBoundaries(
-                    metronome_data[2], metronome_data[0], metronome_data[1]
-                )
+        # Metronomes resolved by the caller are reused as is
+        if self.right_hand_metronomes is None:
+            self.right_hand_metronomes = self.metronomes_for_part(self.right_hand_part)
+        if self.left_hand_metronomes is None:
+            self.left_hand_metronomes = self.metronomes_for_part(self.left_hand_part)
+        self._right_hand_lower_bounds = [
+            metronome.lower_bound for metronome in self.right_hand_metronomes
+        ]
+        self._left_hand_lower_bounds = [
+            metronome.lower_bound for metronome in self.left_hand_metronomes
+        ]
+
+    @staticmethod
+    def metronomes_for_part(
+        part: m21.stream.Part,
+    ) -> list["MetronomeWithBoundaries"]:
+        return [
+            MetronomeWithBoundaries(
+                metronome_data[2], metronome_data[0], metronome_data[1]
             )
+            for metronome_data in part.metronomeMarkBoundaries()
+        ]
 
     @property
     def right_metronome_tempos(self) -> list[float]:
@@ -254,35 +297,70 @@ class MetronomeGetterMixin(SongPartMixin):
     def left_metronome_tempos(self) -> list[float]:
         return [metronome.metronome.number for metronome in self.left_hand_metronomes]
 
+    def seconds_between(
+        self, start: m21.common.OffsetQL, end: m21.common.OffsetQL, hand: Hand
+    ) -> float:
+        """
+        Realized seconds between two offsets across the tempo changes of a hand.
+
+        Matches music21's Stream._accumulatedSeconds, which secondsMap uses.
+        """
+        if hand == Hand.RIGHT:
+            metronomes = self.right_hand_metronomes
+        elif hand == Hand.LEFT:
+            metronomes = self.left_hand_metronomes
+        else:
+            raise ValueError(f"Invalid hand {hand}")
+        total_seconds = 0.0
+        active_start = start
+        for metronome in metronomes:
+            if not metronome.lower_bound <= active_start < metronome.upper_bound:
+                continue
+            active_end = end if end < metronome.upper_bound else metronome.upper_bound
+            total_seconds += metronome.to_seconds(active_end - active_start)
+            if active_end == end:
+                break
+            active_start = active_end
+        return total_seconds
+
     def get_metronome_for_offset(
         self, offset: m21.common.OffsetQL, hand: Hand
     ) -> "MetronomeWithBoundaries":
         offset = float(offset)
         if hand == Hand.RIGHT:
-            if len(self.right_hand_metronomes) == 1:
-                return self.right_hand_metronomes[0]
-            for metronome in self.right_hand_metronomes:
-                if metronome.in_bounds(offset):
-                    return metronome
+            metronomes = self.right_hand_metronomes
+            lower_bounds = self._right_hand_lower_bounds
         elif hand == Hand.LEFT:
-            if len(self.left_hand_metronomes) == 1:
-                return self.left_hand_metronomes[0]
-            for metronome in self.left_hand_metronomes:
-                if metronome.in_bounds(offset):
-                    return metronome
+            metronomes = self.left_hand_metronomes
+            lower_bounds = self._left_hand_lower_bounds
+        else:
+            raise ValueError(f"No metronome found for offset {offset}")
+        if len(metronomes) == 1:
+            return metronomes[0]
+        # The boundaries are sorted and contiguous, so the first one containing
+        # the offset is the last one that starts strictly before it.
+        index = max(bisect.bisect_left(lower_bounds, offset) - 1, 0)
+        if metronomes and metronomes[index].in_bounds(offset):
+            return metronomes[index]
         raise ValueError(f"No metronome found for offset {offset}")
 
 
 @dataclass
 class SongDurationFixer(MetronomeGetterMixin):
     def run(self) -> None:  # sourcery skip: remove-redundant-if
-        left_measure_count = len(self.left_hand_part.measures(0, None))
-        right_measure_count = len(self.right_hand_part.measures(0, None))
+        left_measure_count = len(
+            self.left_hand_part.getElementsByClass(m21.stream.Measure)
+        )
+        right_measure_count = len(
+            self.right_hand_part.getElementsByClass(m21.stream.Measure)
+        )
         measure_count = max(left_measure_count, right_measure_count)
+        rh_measures = self._measures_by_number(self.right_hand_part)
+        lh_measures = self._measures_by_number(self.left_hand_part)
 
         for i in range(measure_count + 1):
-            rh_m = self.right_hand_part.measure(i)
-            lh_m = self.left_hand_part.measure(i)
+            rh_m = rh_measures.get(i)
+            lh_m = lh_measures.get(i)
             generated_measure = False
             if rh_m is None and lh_m is None:
                 continue
@@ -304,8 +382,6 @@ class SongDurationFixer(MetronomeGetterMixin):
             durations_match = rh_m.duration.quarterLength == lh_m.duration.quarterLength
             if not generated_measure and durations_match:
                 continue
-            if rh_m is None:
-                raise ValueError("One of the measures is None")
             logger.info(f"Fixing measure duration for measure {rh_m.number}")
             self.fix_measure_duration(rh_m, lh_m)
 
@@ -348,14 +424,18 @@ class PianoVisionSongBuilder(SongPartMixin):
         if not midi_path:
             raise ValueError(f"No MIDI path provided {midi_path}")
         self.midi_song_path: Path = Path(midi_path)
-        song = converter.parse(self.midi_song_path)
+        # A score already parsed from midi_path can be passed in as m21_song to
+        # skip parsing the file again. It is cleaned up in place.
+        song = self.m21_song
+        if song is None:
+            song = converter.parse(self.midi_song_path)
         if not isinstance(song, m21.stream.Score):
             raise ValueError("Only scores are supported")
         self.m21_song = song
         self._find_part_index()
-        self.m21_song.stripTies(inPlace=True)
-        self.m21_song.makeMeasures(inPlace=True)
         for part in self.m21_song.parts:
+            part.stripTies(inPlace=True)
+            part.makeMeasures(inPlace=True)
             part.makeBeams(inPlace=True)
         SongTimeSignatureFixer(
             self.m21_song,
@@ -373,12 +453,12 @@ class PianoVisionSongBuilder(SongPartMixin):
         if self.m21_song is None:
             raise ValueError("No music21 song found")
 
-        rm = self.right_hand_part.measure(-1)
+        rm = self.right_hand_part.getElementsByClass(m21.stream.Measure).last()
         if rm is None:
             raise ValueError("No last measure found for right hand")
         if rm.duration.quarterLength == 0:
             self.right_hand_part.remove(rm)
-        lm = self.left_hand_part.measure(-1)
+        lm = self.left_hand_part.getElementsByClass(m21.stream.Measure).last()
         if lm is None:
             raise ValueError("No last measure found for left hand")
         if lm.duration.quarterLength == 0:
@@ -420,14 +500,19 @@ class PianoVisionSongBuilder(SongPartMixin):
     @cached_property
     def song_resolution(self) -> int:
         """
-        Reads the MIDI file directly to get the ticks per quarter note.
+        Reads the ticks per quarter note from the MIDI file header.
+
+        Only the 14 byte header chunk is read, the tracks are not parsed again.
         """
-        mf = m21.midi.MidiFile()
-        mf.open(str(self.midi_song_path))
-        mf.read()
-        midi_song_ticks_per_quarter_note = int(mf.ticksPerQuarterNote)
-        mf.close()
-        return midi_song_ticks_per_quarter_note
+        with self.midi_song_path.open("rb") as midi_file:
+            header = midi_file.read(14)
+        if len(header) < 14 or header[:4] != b"MThd":
+            raise ValueError(f"Not a MIDI file: {self.midi_song_path}")
+        division: int = struct.unpack(">H", header[12:14])[0]
+        if division & 0x8000:
+            # SMPTE timing has no ticks per quarter, music21 keeps its default
+            return m21.defaults.ticksPerQuarter
+        return division & 0x7FFF
 
     def _add_fingerings_to_music21(self) -> None:
         """
@@ -463,6 +548,17 @@ class PianoVisionSongBuilder(SongPartMixin):
         if not self.ai:
             self._add_fingerings_to_music21()
 
+        # The score is final at this point, so both metronome based builders
+        # can share the metronome boundaries instead of each resolving them.
+        hand_metronomes = {
+            "right_hand_metronomes": MetronomeGetterMixin.metronomes_for_part(
+                self.right_hand_part
+            ),
+            "left_hand_metronomes": MetronomeGetterMixin.metronomes_for_part(
+                self.left_hand_part
+            ),
+        }
+
         with tqdm(total=6) as pbar:
             logger.info("Building PianoVisionSong")
             tracks_v2 = PianoVisionMeasureBuilder(
@@ -470,6 +566,7 @@ class PianoVisionSongBuilder(SongPartMixin):
                 ticks_per_quarter=self.song_resolution,
                 left_hand_part_index=self.left_hand_part_index,
                 right_hand_part_index=self.right_hand_part_index,
+                **hand_metronomes,
             ).build()
             pbar.update(1)
             tempos = PianoVisionTempoBuilder(
@@ -486,6 +583,7 @@ class PianoVisionSongBuilder(SongPartMixin):
                 self.m21_song,
                 right_hand_part_index=self.right_hand_part_index,
                 left_hand_part_index=self.left_hand_part_index,
+                **hand_metronomes,
             ).build()
             pbar.update(1)
             time_signatures = PianoVisionTimeSignatureBuilder(
@@ -519,44 +617,93 @@ class PianoVisionSongBuilder(SongPartMixin):
         return song
 
     def build_parallel(self) -> PianoVisionSong:
+        """
+        Builds the same PianoVisionSong as build, running the independent
+        builders in worker processes.
+
+        music21 streams do not pickle directly, so the song is frozen once
+        and each worker thaws its own copy.
+        """
         if self.m21_song is None:
             raise ValueError("No music21 song found")
-        with multiprocessing.Pool(processes=multiprocessing.cpu_count()) as pool:
-            functions = {
-                "tracksV2": PianoVisionMeasureBuilder(self.m21_song).build,
-                "tempos": PianoVisionTempoBuilder(self.m21_song).build,
-                "keySignatures": PianoVisionKeySignatureBuilder(self.m21_song).build,
-                "song_length": PianoVisionSongLengthBuilder(self.m21_song).build,
-            }
-            results = {
-                "name": self.song_name,
-                "artist": self.song_author,
-                "resolution": self.song_resolution,
-                "start_time": 0,
-                "accompanyingChannels": [0, 0],
-                "accompanyingInstruments": [-2, -1],
-                "accompanyingTracks": [],
-                "timeSignatures": [],
-                "measures": [],
-                "maxSimplification": 0,
-                "supportingTracks": [],
-                "sections": [],
-                "positionGroups": [],
-                "technicalGroups": [],
+        if not self.ai:
+            self._add_fingerings_to_music21()
+
+        frozen_song = m21.freezeThaw.StreamFreezer(self.m21_song).writeStr()
+        part_indices = {
+            "right_hand_part_index": self.right_hand_part_index,
+            "left_hand_part_index": self.left_hand_part_index,
+        }
+        jobs: dict[str, tuple[type, dict[str, Any]]] = {
+            "tracksV2": (
+                PianoVisionMeasureBuilder,
+                {"ticks_per_quarter": self.song_resolution, **part_indices},
+            ),
+            "tempos": (
+                PianoVisionTempoBuilder,
+                {"ticks_per_quarter": self.song_resolution},
+            ),
+            "keySignatures": (
+                PianoVisionKeySignatureBuilder,
+                {"ticks_per_quarter": self.song_resolution},
+            ),
+            "song_length": (PianoVisionSongLengthBuilder, {}),
+            "supportingTracks": (PianoVisionSupportingTracksBuilder, part_indices),
+            "timeSignatures": (PianoVisionTimeSignatureBuilder, part_indices),
+        }
+
+        processes = min(len(jobs), multiprocessing.cpu_count())
+        with multiprocessing.Pool(
+            processes=processes, initializer=_init_build_worker
+        ) as pool:
+            pending = {
+                name: pool.apply_async(
+                    _build_from_frozen_song, (builder_cls, frozen_song, kwargs)
+                )
+                for name, (builder_cls, kwargs) in jobs.items()
             }
+            results: dict[str, Any] = {}
+            with tqdm(total=len(pending)) as pbar:
+                for name, pending_result in pending.items():
+                    results[name] = pending_result.get()
+                    pbar.update(1)
 
-            with tqdm(total=len(functions)) as pbar:
+        return PianoVisionSong(
+            name=self.song_name,
+            artist=self.song_author,
+            resolution=self.song_resolution,
+            start_time=0,
+            accompanyingChannels=[0, 0],
+            accompanyingInstruments=[-2, -1],
+            accompanyingTracks=[],
+            measures=[],
+            maxSimplification=0,
+            sections=[],
+            positionGroups=[],
+            technicalGroups=[],
+            **results,
+        )
 
-                def update_results(result):
-                    results.update(result)
-                    pbar.update(1)
 
-                for _, func in functions.items():
-                    pool.apply_async(func, callback=update_results)
-            pool.close()
-            pool.join()
+def _init_build_worker() -> None:
+    """
+    Pool initializer for PianoVisionSongBuilder.build_parallel.
+    """
+    # Imported here because the package imports this module
+    from piano_vision_fingering_generator import _log_without_listener
+
+    _log_without_listener()
 
-        return PianoVisionSong(**results)
+
+def _build_from_frozen_song(
+    builder_cls: type, frozen_song: bytes, kwargs: dict[str, Any]
+) -> Any:
+    """
+    Worker entry point for PianoVisionSongBuilder.build_parallel.
+    """
+    thawer = m21.freezeThaw.StreamThawer()
+    thawer.openStr(frozen_song)
+    return builder_cls(thawer.stream, **kwargs).build()
 
 
 @dataclass
@@ -564,7 +711,7 @@ class PianoVisionSongLengthBuilder:
     m21_song: m21.stream.Score
 
     def build(self) -> float:
-        logging.info("Building PianoVisionSongLength")
+        logger.info("Building PianoVisionSongLength")
         metronome = (
             self.m21_song.recurse().getElementsByClass(m21.tempo.MetronomeMark).first()
         )
@@ -620,7 +767,7 @@ class PianoVisionKeySignatureBuilder:
     ticks_per_quarter: int = 480
 
     def build(self) -> list[KeySignature]:
-        logging.info("Building PianoVisionKeySignature")
+        logger.info("Building PianoVisionKeySignature")
         result: list[KeySignature] = []
         for key_sig in self.m21_song.recurse().getElementsByClass(m21.key.KeySignature):
             key = key_sig.asKey()
@@ -638,7 +785,7 @@ class PianoVisionTempoBuilder:
     ticks_per_quarter: int = 480
 
     def build(self) -> list[Tempo]:
-        logging.info("Building PianoVisionTempo")
+        logger.info("Building PianoVisionTempo")
         result: list[Tempo] = []
         for lower_bound, _, metronome in self.m21_song.metronomeMarkBoundaries():
             time = metronome.durationToSeconds(lower_bound)
@@ -652,14 +799,29 @@ class PianoVisionTempoBuilder:
         return result
 
 
-@dataclass
+@dataclass(slots=True)
 class MetronomeWithBoundaries:
     metronome: m21.tempo.MetronomeMark
     lower_bound: float
     upper_bound: float
+    _seconds_per_quarter: Optional[float] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    @property
+    def seconds_per_quarter(self) -> float:
+        if self._seconds_per_quarter is None:
+            self._seconds_per_quarter = self.metronome.secondsPerQuarter()
+        return self._seconds_per_quarter
 
     def to_seconds(self, offset: m21.common.OffsetQL | m21.duration.Duration) -> float:
-        return self.metronome.durationToSeconds(offset)
+        """
+        Same result as MetronomeMark.durationToSeconds, but the tempo is only
+        resolved once per metronome instead of on every call.
+        """
+        if isinstance(offset, m21.duration.Duration):
+            offset = offset.quarterLength
+        return self.seconds_per_quarter * offset
 
     def in_bounds(self, offset: float) -> bool:
         return self.lower_bound <= offset <= self.upper_bound
@@ -687,45 +849,63 @@ class PianoVisionSupportingTracksBuilder(MetronomeGetterMixin):
     def _build_supporting_track_for_hand(
         self, part: m21.stream.Part, hand: Hand
     ) -> SupportingTrack:
-        notes: list[SupportingTrackMidi] = []
+        offsets, quarter_lengths, midis, velocities = self._collect_note_columns(part)
+        metronomes = [self.get_metronome_for_offset(offset, hand) for offset in offsets]
+        # The columns already hold ints and floats, so the per-note validation of
+        # SupportingTrackMidi is skipped.
+        notes: list[SupportingTrackMidi] = [
+            SupportingTrackMidi.model_construct(
+                midi=midi,
+                time=metronome.to_seconds(offset),
+                duration=metronome.to_seconds(quarter_length),
+                velocity=velocity,
+            )
+            for metronome, offset, quarter_length, midi, velocity in zip(
+                metronomes, offsets, quarter_lengths, midis, velocities, strict=True
+            )
+        ]
+        return SupportingTrack(myInstrument=-5, theirInstrument=0, notes=notes)
+
+    def _collect_note_columns(
+        self, part: m21.stream.Part
+    ) -> tuple[list[float], list[m21.common.OffsetQL], list[int], list[float]]:
+        """
+        Reads the offset, quarter length, MIDI pitch and velocity of every note
+        in the part in a single pass, expanding chords into their notes.
+        """
+        offsets: list[float] = []
+        quarter_lengths: list[m21.common.OffsetQL] = []
+        midis: list[int] = []
+        velocities: list[float] = []
         for el in part.flatten().notes:
             match el:
                 case m21.note.Note():
-                    stm = self._build_supporting_track_midis_from_m21_note(el, hand)
-                    notes.append(stm)
+                    el_notes: tuple[m21.note.Note, ...] = (el,)
                 case m21.chord.Chord():
-                    stms = self._build_supporting_track_midis_from_m21_chord(el, hand)
-                    notes.extend(stms)
-        return SupportingTrack(myInstrument=-5, theirInstrument=0, notes=notes)
+                    el_notes = el.notes
+                case _:
+                    continue
+            offset = float(el.offset)
+            for note in el_notes:
+                volume = note.volume.velocityScalar
+                offsets.append(offset)
+                quarter_lengths.append(note.duration.quarterLength)
+                midis.append(note.pitch.midi)
+                velocities.append(float(volume) if volume is not None else 0.0)
+        return offsets, quarter_lengths, midis, velocities
+
+
+@dataclass(slots=True)
+class _MeasureContext:
+    """
+    The values of a music21 measure that every note in it needs, read once
+    per measure.
+    """
 
-    def _build_supporting_track_midis_from_m21_chord(
-        self, chord: m21.chord.Chord, hand: Hand
-    ) -> list[SupportingTrackMidi]:
-        result = []
-        for note in chord.notes:
-            note.offset = chord.offset
-            stm = self._build_supporting_track_midis_from_m21_note(note, hand)
-            result.append(stm)
-        return result
-
-    def _build_supporting_track_midis_from_m21_note(
-        self, note: m21.note.Note, hand: Hand
-    ) -> SupportingTrackMidi:
-        offset = float(note.offset)
-        metronome = self.get_metronome_for_offset(offset, hand)
-        start_time = metronome.to_seconds(offset)
-        duration = metronome.to_seconds(note.duration)
-        volume = note.volume.velocityScalar
-        if volume is None:
-            volume = float(0)
-        elif not isinstance(volume, float):
-            volume = float(volume)
-        return SupportingTrackMidi(
-            midi=note.pitch.midi,
-            time=start_time,
-            duration=duration,
-            velocity=volume,
-        )
+    measure: m21.stream.Measure
+    offset: m21.common.OffsetQL
+    quarter_length: m21.common.OffsetQL
+    index: int
 
 
 @dataclass
@@ -737,18 +917,10 @@ class PianoVisionMeasureBuilder(MetronomeGetterMixin):
     ----------
         midi_song: m21.stream.Score
             The music21 object representing the MIDI song.
-        min_note_id: int
-            The minimum MIDI note ID encountered during the building process.
-        max_note_id: int
-            The maximum MIDI note ID encountered during the building process.
-        note_count: int
-            The total count of notes encountered during the building process.
-        measure_note_count: int
-            The count of notes within the current measure being processed.
         _metronome: Optional[m21.tempo.MetronomeMark]
             The metronome mark for the current measure.
-        _time_sig: Optional[m21.meter.TimeSignature]
-            The time signature for the current measure.
+        _time_signatures: dict[Hand, m21.meter.TimeSignature]
+            The time signature for the current measure of each hand.
 
     Properties
     ----------
@@ -769,32 +941,34 @@ class PianoVisionMeasureBuilder(MetronomeGetterMixin):
     """
 
     ticks_per_quarter: int = 480
-    min_note_id: int = field(default=0, init=False)
-    max_note_id: int = field(default=0, init=False)
-    note_count: int = field(default=0, init=False)
-    measure_note_count: int = field(default=0, init=False)
-    _right_time_sig: Optional[m21.meter.TimeSignature] = field(default=None, init=False)
-    _left_time_sig: Optional[m21.meter.TimeSignature] = field(default=None, init=False)
+    _time_signatures: dict[Hand, m21.meter.TimeSignature] = field(
+        default_factory=dict, init=False
+    )
     _active_tie: Optional[m21.tie.Tie] = field(default=None, init=False)
     _active_tie_note: Optional[m21.note.Note] = field(default=None, init=False)
+    _element_handlers: dict[type, Callable[..., Note | list[Note] | Rest]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
 
     def __post_init__(self) -> None:
         MetronomeGetterMixin.__post_init__(self)
+        # Exact type lookups for the common elements, subclasses fall back to
+        # the match in _handle_m21_general_note
+        self._element_handlers = {
+            m21.note.Note: self._handle_m21_note,
+            m21.chord.Chord: self._build_pv_notes_from_m21_chord,
+            m21.note.Rest: self._handle_m21_rest,
+        }
 
     def get_time_signature(self, hand: Hand) -> Optional[m21.meter.TimeSignature]:
-        if hand == Hand.RIGHT:
-            return self._right_time_sig
-        elif hand == Hand.LEFT:
-            return self._left_time_sig
-        raise ValueError(f"Invalid hand {hand}")
+        if hand not in _HAND_ABBREVIATIONS:
+            raise ValueError(f"Invalid hand {hand}")
+        return self._time_signatures.get(hand)
 
     def set_time_signature(self, hand: Hand, time_sig: m21.meter.TimeSignature) -> None:
-        if hand == Hand.RIGHT:
-            self._right_time_sig = time_sig
-        elif hand == Hand.LEFT:
-            self._left_time_sig = time_sig
-        else:
+        if hand not in _HAND_ABBREVIATIONS:
             raise ValueError(f"Invalid hand {hand}")
+        self._time_signatures[hand] = time_sig
 
     def build(self) -> TracksV2:
         """
@@ -807,13 +981,15 @@ class PianoVisionMeasureBuilder(MetronomeGetterMixin):
             - _build_piano_vision_measures_for_hand()
             - _build_pv_measure_from_m21_measure()
                 - _handle_m21_general_note()
-                    - _build_pv_note_from_m21_note()
-                        - _build_pv_note()
+                    - _handle_m21_note()
+                        - _build_pv_note_from_m21_note()
+                            - _build_pv_note()
                     - _build_pv_notes_from_m21_chord()
                         - _build_pv_note()
-                    - _build_pv_rest_from_m21_rest()
+                    - _handle_m21_rest()
+                        - _build_pv_rest_from_m21_rest()
         """
-        logging.info("Building PianoVisionMeasures")
+        logger.info("Building PianoVisionMeasures")
         right_measures = self._build_piano_vision_measures_for_hand(
             self.right_hand_part, Hand.RIGHT
         )
@@ -827,58 +1003,72 @@ class PianoVisionMeasureBuilder(MetronomeGetterMixin):
         self, part: m21.stream.Part, hand: Hand
     ) -> list[PianoVisionMeasure]:
         pv_measures = []
-        self.note_count = 0
-        for measure_data in part.secondsMap:
-            if not isinstance(measure_data["element"], m21.stream.Measure):
-                continue
+        note_count = 0
+        # Same times as part.secondsMap, but only computed for the measures
+        lowest_offset = part.lowestOffset
+        for measure in part.getElementsByClass(m21.stream.Measure):
+            offset = round(measure.getOffsetBySite(part), 8)
+            offset_seconds = self.seconds_between(lowest_offset, offset, hand)
+            duration_seconds = self.seconds_between(
+                offset, offset + measure.duration.quarterLength, hand
+            )
+            measure_data = {
+                "element": measure,
+                "offsetSeconds": offset_seconds,
+                "endTimeSeconds": offset_seconds + duration_seconds,
+            }
             pv_measure = self._build_pv_measure_from_m21_measure(
                 measure_data,
                 hand,
+                note_count,
             )
             pv_measures.append(pv_measure)
+            note_count += pv_measure.note_count
         return pv_measures
 
-    def _get_metronomes_for_hand(self, part: m21.stream.Part, hand: Hand) -> None:
-        metronomes = [
-            MetronomeWithBoundaries(
-                metronome_data[2], metronome_data[0], metronome_data[1]
-            )
-            for metronome_data in part.metronomeMarkBoundaries()
-        ]
-        if hand == Hand.RIGHT:
-            self._right_hand_metronomes = metronomes
-        elif hand == Hand.LEFT:
-            self._left_hand_metronomes = metronomes
-
     # Called by _build_piano_vision_measures_for_hand
     def _build_pv_measure_from_m21_measure(
-        self, measure_data: dict[str, Any], hand: Hand
+        self, measure_data: dict[str, Any], hand: Hand, first_note_index: int = 0
     ) -> PianoVisionMeasure:
-        # reset tracked values
-        self.measure_note_count: int = 0
-        self.max_note_id = 0
-        self.min_note_id = 200
+        """
+        Notes are numbered per hand from ``first_note_index`` on, and per
+        measure from 0.
+        """
         measure: m21.stream.Measure = measure_data["element"]  # type: ignore
 
         # Check if the time signature has changed
-        if (
-            measure.timeSignature
-            and self.get_time_signature(hand) != measure.timeSignature
-        ):
-            self.set_time_signature(hand, measure.timeSignature)
-
         time_sig = self.get_time_signature(hand)
+        measure_time_sig = measure.timeSignature
+        if measure_time_sig and time_sig != measure_time_sig:
+            time_sig = measure_time_sig
+            self.set_time_signature(hand, time_sig)
+
         if not time_sig:
             raise ValueError("No time signature found")
         time_signature = TimeSignature([time_sig.numerator, time_sig.denominator])
 
         notes: list[Note] = []
         rests: list[Rest] = []
+        measure_context = _MeasureContext(
+            measure=measure,
+            offset=measure.offset,
+            quarter_length=measure.duration.quarterLength,
+            index=(measure.measureNumber or 1) - 1,
+        )
+        # Only single notes count towards the measure's pitch range, not chords
+        single_note_midis: list[int] = []
         for element in measure.notesAndRests:
-            pv_element = self._handle_m21_general_note(element, measure, hand)
+            pv_element = self._handle_m21_general_note(
+                element,
+                measure_context,
+                hand,
+                first_note_index + len(notes),
+                len(notes),
+            )
             match pv_element:
                 case Note():
                     notes.append(pv_element)
+                    single_note_midis.append(pv_element.note)
                 case list():
                     notes.extend(pv_element)
                 case Rest():
@@ -889,71 +1079,107 @@ class PianoVisionMeasureBuilder(MetronomeGetterMixin):
             float(measure.offset + measure.duration.quarterLength)
             * self.ticks_per_quarter
         )
-        return PianoVisionMeasure(
-            direction=Direction.DOWN,
+        return PianoVisionMeasure.model_construct(
+            direction=Direction.DOWN.value,
             time=measure_data["offsetSeconds"],
             timeEnd=measure_data["endTimeSeconds"],
-            max=self.max_note_id,
-            min=self.min_note_id,
+            max=max(single_note_midis, default=0),
+            min=min(single_note_midis, default=200),
             measureTicksEnd=tick_end,
             measureTicksStart=tick_start,
             notes=notes,
             rests=rests,
-            timeSignature=time_signature,
+            timeSignature=time_signature.value,
         )
 
     # Called by _build_pv_measure_from_m21_measure
     def _handle_m21_general_note(
-        self, element: m21.note.GeneralNote, measure: m21.stream.Measure, hand: Hand
+        self,
+        element: m21.note.GeneralNote,
+        measure_context: _MeasureContext,
+        hand: Hand,
+        note_index: int,
+        measure_note_index: int,
     ) -> Note | list[Note] | Rest:
+        args = (measure_context, hand, note_index, measure_note_index)
+        handler = self._element_handlers.get(type(element))
+        if handler is not None:
+            return handler(element, *args)
         match element:
             case m21.note.Note():
-                if element.tie is not None:
-                    if element.tie.type == "start":
-                        self._active_tie_note = element
-                    if element.tie.type == "stop":
-                        if self._active_tie_note is not None:
-                            for articulation in self._active_tie_note.articulations:
-                                if isinstance(
-                                    articulation, m21.articulations.Fingering
-                                ):
-                                    element.articulations.append(articulation)
-                        self._active_tie_note = None
-                return self._build_pv_note_from_m21_note(element, measure, hand)
+                return self._handle_m21_note(element, *args)
             case m21.chord.Chord():
-                return self._build_pv_notes_from_m21_chord(element, measure, hand)
+                return self._build_pv_notes_from_m21_chord(element, *args)
             case m21.note.Rest():
-                return self._build_pv_rest_from_m21_rest(element, hand)
+                return self._handle_m21_rest(element, *args)
         raise ValueError(f"Element {element} not supported")
 
+    # Called by _handle_m21_general_note
+    def _handle_m21_note(
+        self,
+        element: m21.note.Note,
+        measure_context: _MeasureContext,
+        hand: Hand,
+        note_index: int,
+        measure_note_index: int,
+    ) -> Note:
+        if element.tie is not None:
+            if element.tie.type == "start":
+                self._active_tie_note = element
+            if element.tie.type == "stop":
+                if self._active_tie_note is not None:
+                    for articulation in self._active_tie_note.articulations:
+                        if isinstance(articulation, m21.articulations.Fingering):
+                            element.articulations.append(articulation)
+                self._active_tie_note = None
+        return self._build_pv_note_from_m21_note(
+            element, measure_context, hand, note_index, measure_note_index
+        )
+
+    # Called by _handle_m21_general_note
+    def _handle_m21_rest(
+        self,
+        element: m21.note.Rest,
+        measure_context: _MeasureContext,
+        hand: Hand,
+        note_index: int,
+        measure_note_index: int,
+    ) -> Rest:
+        return self._build_pv_rest_from_m21_rest(element, hand)
+
     # Called by _handle_m21_general_note
     def _build_pv_note_from_m21_note(
         self,
         m21_note: m21.note.Note,
-        measure: m21.stream.Measure,
+        measure_context: _MeasureContext,
         hand: Hand,
+        note_index: int,
+        measure_note_index: int,
     ) -> Note:
         fingering = Finger.NOT_SET
         for art in m21_note.articulations:
             if isinstance(art, m21.articulations.Fingering):
                 fingering = Finger(art.fingerNumber)
             else:
-                print(art)
-        if m21_note.pitch.midi < self.min_note_id:
-            self.min_note_id = m21_note.pitch.midi
-        if m21_note.pitch.midi > self.max_note_id:
-            self.max_note_id = m21_note.pitch.midi
+                logger.debug("Unhandled articulation: %s", art)
         note: Note = self._build_pv_note(
             m21_note,
-            measure,
+            measure_context,
             hand,
             fingering,
+            note_index,
+            measure_note_index,
         )
         return note
 
     # Called by _handle_m21_general_note
     def _build_pv_notes_from_m21_chord(
-        self, m21_chord: m21.chord.Chord, measure: m21.stream.Measure, hand: Hand
+        self,
+        m21_chord: m21.chord.Chord,
+        measure_context: _MeasureContext,
+        hand: Hand,
+        note_index: int,
+        measure_note_index: int,
     ) -> list[Note]:
         notes: list[Note] = []
         fingerings: list[Finger] = []
@@ -961,14 +1187,22 @@ class PianoVisionMeasureBuilder(MetronomeGetterMixin):
             if isinstance(art, m21.articulations.Fingering):
                 fingerings.append(Finger(art.fingerNumber))
             else:
-                print(art)
-        for chord_note, fingering in zip(m21_chord.notes, fingerings, strict=False):
-            chord_note.offset = m21_chord.offset
+                logger.debug("Unhandled articulation: %s", art)
+        chord_notes = m21_chord.notes
+        # Notes without a fingering of their own are kept with no finger set
+        fingerings.extend([Finger.NOT_SET] * (len(chord_notes) - len(fingerings)))
+        chord_offset = m21_chord.offset
+        for i, (chord_note, fingering) in enumerate(
+            zip(chord_notes, fingerings, strict=False)
+        ):
             note = self._build_pv_note(
                 chord_note,
-                measure,
+                measure_context,
                 hand,
                 fingering,
+                note_index + i,
+                measure_note_index + i,
+                offset=chord_offset,
             )
             notes.append(note)
         return notes
@@ -979,7 +1213,7 @@ class PianoVisionMeasureBuilder(MetronomeGetterMixin):
         if not m21_rest.activeSite:
             raise ValueError("No active site found for rest")
         start_time = metronome.to_seconds(m21_rest.activeSite.offset + m21_rest.offset)
-        return Rest(
+        return Rest.model_construct(
             noteLengthType=NoteLengthType.from_duration(m21_rest.duration),
             time=start_time,
         )
@@ -988,48 +1222,64 @@ class PianoVisionMeasureBuilder(MetronomeGetterMixin):
     def _build_pv_note(
         self,
         m21_note: m21.note.Note,
-        m21_measure: m21.stream.Measure,  # type: ignore
+        measure_context: _MeasureContext,
         note_hand: Hand,
         fingering: Finger,
+        note_index: int,
+        measure_note_index: int,
+        offset: Optional[m21.common.OffsetQL] = None,
     ) -> Note:
-        octave: int = int(m21_note.pitch.octave)  # type: ignore
-        hand_abbrev = "r" if note_hand == Hand.RIGHT else "l"
-        metronome = self.get_metronome_for_offset(m21_note.offset, note_hand)
-        note_id = f"{hand_abbrev}{self.note_count}"
-        note_offset = float(m21_measure.offset + m21_note.offset)
+        """
+        ``offset`` overrides the note's offset within the measure, for chord
+        notes that take their offset from the chord.
+        """
+        pitch = m21_note.pitch
+        duration = m21_note.duration
+        note_local_offset = m21_note.offset if offset is None else offset
+        octave: int = int(pitch.octave)  # type: ignore
+        hand_abbrev = _HAND_ABBREVIATIONS[note_hand]
+        metronome = self.get_metronome_for_offset(note_local_offset, note_hand)
+        note_id = f"{hand_abbrev}{note_index}"
+        note_offset = float(measure_context.offset + note_local_offset)
         start_ticks = int(self.ticks_per_quarter * note_offset)
-        duration_ticks = int(self.ticks_per_quarter * m21_note.quarterLength)
-        velocity = 0
-        if m21_note.volume.velocityScalar is not None:
-            velocity = float(m21_note.volume.velocityScalar)
-        measure_fraction = float(m21_note.offset / m21_measure.duration.quarterLength)
-        measure_number = (m21_measure.measureNumber or 1) - 1
+        duration_ticks = int(self.ticks_per_quarter * duration.quarterLength)
+        velocity = 0.0
+        velocity_scalar = m21_note.volume.velocityScalar
+        if velocity_scalar is not None:
+            velocity = float(velocity_scalar)
+        measure_fraction = float(note_local_offset / measure_context.quarter_length)
+        measure_number = measure_context.index
         measure_bars = measure_number + measure_fraction
-        if m21_note.duration.type == "complex":
-            nearest = round_duration_to_nearest(m21_note.duration)
-            m21_note.duration = nearest
-        note = Note(
+        if duration.type == "complex":
+            duration = round_duration_to_nearest(duration)
+            m21_note.duration = duration
+            # A rounded note can change the length of its measure
+            measure_context.quarter_length = (
+                measure_context.measure.duration.quarterLength
+            )
+        quarter_length = duration.quarterLength
+        # Every value already has its field's type, so validation is skipped.
+        # Enums are stored by value, as use_enum_values would on validation.
+        note = Note.model_construct(
             id=note_id,
-            note=m21_note.pitch.midi,
-            duration=metronome.to_seconds(m21_note.duration),
+            note=pitch.midi,
+            duration=metronome.to_seconds(quarter_length),
             durationTicks=duration_ticks,
-            finger=fingering,
+            finger=fingering.value,
             group=-1,
             start=metronome.to_seconds(note_offset),
-            end=metronome.to_seconds(note_offset + m21_note.duration.quarterLength),
+            end=metronome.to_seconds(note_offset + quarter_length),
             measureBars=measure_bars,
             noteOffVelocity=0,
             ticksStart=start_ticks,
             velocity=velocity,
-            noteName=m21_note.pitch.nameWithOctave,
+            noteName=pitch.nameWithOctave,
             octave=octave,
-            notePitch=m21_note.pitch.name,
-            noteLengthType=NoteLengthType.from_duration(m21_note.duration),
+            notePitch=pitch.name,
+            noteLengthType=NoteLengthType.from_duration(duration).value,
             measureInd=measure_number,
-            noteMeasureInd=self.measure_note_count,
+            noteMeasureInd=measure_note_index,
         )
-        self.note_count += 1
-        self.measure_note_count += 1
         return note
 
 
@@ -1,6 +1,9 @@
+import logging
 import signal
 import sys
+import threading
 import tkinter as tk
+from concurrent.futures import Future
 from pathlib import Path
 from tkinter import filedialog, ttk
 from typing import Optional
@@ -10,6 +13,8 @@ from ttkthemes import ThemedTk
 from piano_vision_fingering_generator.constants import HandSize
 from piano_vision_fingering_generator.io import build_and_save_piano_vision_json
 
+logger = logging.getLogger(__name__)
+
 
 class PianoVisionFingeringGeneratorApp:
     def __init__(self):
@@ -42,6 +47,8 @@ class PianoVisionFingeringGeneratorApp:
         )
         self.root.after(100, self._check_interrupt)
         self.process_button.pack(pady=10)
+        self.status_label = ttk.Label(self.root, text="")
+        self.status_label.pack(pady=10)
 
     def _on_interrupt(self, sig, frame):
         print("\nCtrl+C caught. Exiting the application...")
@@ -63,7 +70,38 @@ class PianoVisionFingeringGeneratorApp:
     def process_file(self):
         if self.selected_file and self.selected_file.exists():
             hand_size = HandSize(self.selected_choice.get())
-            build_and_save_piano_vision_json(self.selected_file, hand_size)
+            self.select_button.config(state=tk.DISABLED)
+            self.process_button.config(state=tk.DISABLED)
+            self.status_label.config(text="Processing...")
+            future: Future = Future()
+            # Songs are built off the Tk thread so the window keeps responding.
+            # The thread is a daemon so quitting doesn't wait for the build.
+            threading.Thread(
+                target=self._build_song,
+                args=(future, self.selected_file, hand_size),
+                daemon=True,
+            ).start()
+            self.root.after(200, self._poll_future, future)
+
+    @staticmethod
+    def _build_song(future: Future, midi_file: Path, hand_size: HandSize) -> None:
+        try:
+            future.set_result(build_and_save_piano_vision_json(midi_file, hand_size))
+        except Exception as error:
+            future.set_exception(error)
+
+    def _poll_future(self, future: Future) -> None:
+        if not future.done():
+            self.root.after(200, self._poll_future, future)
+            return
+        self.select_button.config(state=tk.NORMAL)
+        self.process_button.config(state=tk.NORMAL)
+        error = future.exception()
+        if error is None:
+            self.status_label.config(text="Done")
+        else:
+            logger.error("Failed to build %s", self.selected_file, exc_info=error)
+            self.status_label.config(text=f"Failed: {error}")
 
     def select_file(self):
         file_path = filedialog.askopenfilename()
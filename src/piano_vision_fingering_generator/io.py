@@ -1,5 +1,4 @@
 import difflib
-import json
 from pathlib import Path
 from typing import Optional
 
@@ -10,9 +9,7 @@ from piano_vision_fingering_generator.models import PianoVisionSong
 
 def read_piano_vision_json(pv_path: StrPath) -> PianoVisionSong:
     pv_path = Path(pv_path)
-    data = json.loads(pv_path.read_text())
-    # return PianoVisionSong.model_validate_json(pv_path.read_text())
-    return PianoVisionSong.model_validate(data)
+    return PianoVisionSong.model_validate_json(pv_path.read_bytes())
 
 
 def save_piano_vision_json(
@@ -21,7 +18,7 @@ def save_piano_vision_json(
     indent: int = 2,
 ) -> None:
     pv_path = Path(pv_path)
-    pv_path.write_text(song.model_dump_json(indent=indent, by_alias=True))
+    pv_path.write_bytes(song.to_json_bytes(indent=indent))
 
 
 def build_piano_vision_json(
@@ -65,10 +62,12 @@ def build_and_save_piano_vision_json(
 def compare_piano_vision_json_files(pv_path1: StrPath, pv_path2: StrPath):
     pv_path1 = Path(pv_path1)
     pv_path2 = Path(pv_path2)
+    # Both files are normalized through the model so that only differences in
+    # content show up.
     song1 = read_piano_vision_json(pv_path1)
     song2 = read_piano_vision_json(pv_path2)
-    song_1_data = song1.model_dump_json(by_alias=True, indent=2).strip().splitlines()
-    song_2_data = song2.model_dump_json(by_alias=True, indent=2).strip().splitlines()
+    song_1_data = song1.to_json_bytes(indent=2).decode().strip().splitlines()
+    song_2_data = song2.to_json_bytes(indent=2).decode().strip().splitlines()
     output_data = list(difflib.unified_diff(song_1_data, song_2_data))
     output_path = Path(f"{pv_path1.stem}_diff_{pv_path2.stem}.diff")
     output_path.write_text("\n".join(output_data))
@@ -1,4 +1,6 @@
-from typing import Any, Optional, Union
+import re
+from itertools import chain
+from typing import Any, Final, Iterator, Optional, Union
 
 import yaml
 from pydantic import BaseModel, ConfigDict, Field
@@ -13,15 +15,36 @@ from piano_vision_fingering_generator.constants import (
 
 HandOrString = Union[Hand, str]
 
+# Note names such as C4, F#5 or B-3 dump as plain YAML scalars
+_PLAIN_NOTE_NAME: Final = re.compile(r"[A-G][#-]*\d+")
+
+
+_HAND_NAMES: Final = {
+    "r": Hand.RIGHT,
+    "right": Hand.RIGHT,
+    "righthand": Hand.RIGHT,
+    "right_hand": Hand.RIGHT,
+    "l": Hand.LEFT,
+    "left": Hand.LEFT,
+    "lefthand": Hand.LEFT,
+    "left_hand": Hand.LEFT,
+}
+
 
 def string_to_hand(hand: str) -> Hand:
-    if hand.lower() in {"r", "right", "righthand", "right_hand"}:
-        hand = "right"
-    elif hand.lower() in {"l", "left", "lefthand", "left_hand"}:
-        hand = "left"
+    matched_hand = _HAND_NAMES.get(hand.lower())
+    if matched_hand is not None:
+        return matched_hand
     return Hand(hand)
 
 
+def _as_hand(hand: HandOrString) -> Hand:
+    # Hand is a str enum, so it has to be checked before parsing the name
+    if isinstance(hand, Hand):
+        return hand
+    return string_to_hand(hand)
+
+
 class Rest(BaseModel):
     time: float
     noteLengthType: NoteLengthType
@@ -59,6 +82,17 @@ class Note(BaseModel):
         }
 
     def simple_yaml(self) -> str:
+        finger = self.finger
+        if (finger is None or type(finger) is int) and _PLAIN_NOTE_NAME.fullmatch(
+            self.note_name
+        ):
+            # Same text safe_dump writes for these values, keys sorted
+            return (
+                f"finger: {'null' if finger is None else finger}\n"
+                f"measure: {self.measure}\n"
+                f"name: {self.note_name}\n"
+                f"note: {self.note}\n"
+            )
         return yaml.safe_dump(self.simple_json())
 
 
@@ -81,12 +115,15 @@ class PianoVisionMeasure(BaseModel):
         return len(self.notes)
 
     def to_measure(self) -> "Measure":
-        return Measure(
-            time=self.time,
-            timeSignature=self.time_signature,
-            ticksPerMeasure=int(self.measure_ticks_end - self.measure_ticks_start),
-            ticksStart=self.measure_ticks_start,
-            totalTicks=self.measure_ticks_end - self.measure_ticks_start,
+        total_ticks = float(self.measure_ticks_end - self.measure_ticks_start)
+        # The values come from an existing measure, so they are only converted to
+        # the field types instead of validated again.
+        return Measure.model_construct(
+            time=float(self.time),
+            time_signature=TimeSignature(self.time_signature),
+            ticks_per_measure=int(total_ticks),
+            ticks_start=float(self.measure_ticks_start),
+            total_ticks=total_ticks,
             type=2,  # TODO: What does type mean? Seen 0, 1, 2. Almost always 2.
         )
 
@@ -97,11 +134,17 @@ class TracksV2(BaseModel):
 
     @property
     def all_notes(self) -> list[Note]:
-        notes: list[Note] = []
-        for hand in (Hand.LEFT, Hand.RIGHT):
-            for measure in self[hand]:
-                notes.extend(measure.notes)
-        return notes
+        return [*self.left_notes, *self.right_notes]
+
+    def iter_all_notes(self) -> Iterator[Note]:
+        """
+        Iterates the notes in the same order as all_notes without building a list.
+        """
+        return chain.from_iterable(
+            measure.notes
+            for measures in (self.left, self.right)
+            for measure in measures
+        )
 
     @property
     def right_notes(self) -> list[Note]:
@@ -118,28 +161,25 @@ class TracksV2(BaseModel):
         return notes
 
     def __getitem__(self, hand: HandOrString) -> list[PianoVisionMeasure]:
-        if isinstance(hand, str):
-            hand = string_to_hand(hand)
-        return getattr(self, hand)
+        hand = _as_hand(hand)
+        return self.right if hand == Hand.RIGHT else self.left
 
     def get_note_by_id(self, hand: Union[Hand, str], id: int) -> Optional[Note]:
-        if isinstance(hand, str):
-            hand = string_to_hand(hand)
+        hand = _as_hand(hand)
         id_prefix: str = "r" if hand == Hand.RIGHT else "l"
+        note_id = f"{id_prefix}{id}"
         for measure in self[hand]:
             for note in measure.notes:
-                if note.id == f"{id_prefix}{id}":
+                if note.id == note_id:
                     return note
         return None
 
     def get_number_of_measures(self, hand: Union[Hand, str]) -> int:
-        if isinstance(hand, str):
-            hand = string_to_hand(hand)
+        hand = _as_hand(hand)
         return len(self[hand])
 
     def get_number_of_notes(self, hand: Union[Hand, str]) -> int:
-        if isinstance(hand, str):
-            hand = string_to_hand(hand)
+        hand = _as_hand(hand)
         return sum(measure.note_count for measure in self[hand])
 
 
@@ -226,3 +266,12 @@ class PianoVisionSong(BaseModel):
     position_groups: list[PianoVisionPositionGroup] = Field(alias="positionGroups")
     technical_groups: list[PianoVisionTechnicalGroup] = Field(alias="technicalGroups")
     max_simplification: int = Field(alias="maxSimplification")
+
+    def to_json_bytes(self, indent: Optional[int] = None) -> bytes:
+        """
+        Serializes the song to PianoVision JSON as UTF-8 bytes.
+
+        The bytes come straight from pydantic-core's serializer, skipping the
+        decode to str that model_dump_json does.
+        """
+        return self.__pydantic_serializer__.to_json(self, indent=indent, by_alias=True)
@@ -1,10 +1,43 @@
 import cProfile
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import threading
 from functools import wraps
+from typing import IO, Final
 
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for py-spy to start sampling before running the function
+_PY_SPY_START_TIMEOUT: Final = 5.0
+
+
+def profile(func=None, *, enabled: bool = True, sampler: str = "cprofile"):
+    """
+    Profiles every call of the decorated function.
+
+    ``sampler="py-spy"`` records the calls with an external py-spy process
+    into ``<function name>.svg`` instead of tracing them with cProfile.
+    With ``enabled=False`` the function is returned undecorated.
+    """
+    if func is None:
+        return lambda f: profile(f, enabled=enabled, sampler=sampler)
+    if not enabled:
+        return func
+    if sampler not in ("cprofile", "py-spy"):
+        raise ValueError(f"Unknown sampler {sampler}")
+    py_spy = None
+    if sampler == "py-spy":
+        py_spy = shutil.which("py-spy")
+        if py_spy is None:
+            raise ValueError("The py-spy sampler needs py-spy installed on PATH")
 
-def profile(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
+        if py_spy is not None:
+            return _sample_with_py_spy(py_spy, func, *args, **kwargs)
         profiler = cProfile.Profile()
         profiler.enable()
         try:
@@ -15,3 +48,56 @@ def profile(func):
         return result
 
     return wrapper
+
+
+def _sample_with_py_spy(py_spy: str, func, *args, **kwargs):
+    recorder = subprocess.Popen(
+        [
+            py_spy,
+            "record",
+            "--pid",
+            str(os.getpid()),
+            "--output",
+            f"{func.__name__}.svg",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    if recorder.stdout is None:
+        raise ValueError("Could not read the py-spy output")
+    output: list[str] = []
+    # py-spy prints a line once it has attached and started sampling, or exits
+    # if it cannot attach. The output is read on a thread, so neither a silent
+    # py-spy nor a full pipe can block the profiled call.
+    started = threading.Event()
+    reader = threading.Thread(
+        target=_read_py_spy_output, args=(recorder.stdout, output, started)
+    )
+    reader.start()
+    started.wait(_PY_SPY_START_TIMEOUT)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        # py-spy writes the recording when it is interrupted
+        if recorder.poll() is None:
+            recorder.send_signal(signal.SIGINT)
+        recorder.wait()
+        reader.join()
+        if recorder.returncode != 0:
+            logger.warning(
+                "py-spy failed to record %s (exit code %s): %s",
+                func.__name__,
+                recorder.returncode,
+                "".join(output).strip(),
+            )
+
+
+def _read_py_spy_output(
+    stream: IO[str], output: list[str], started: threading.Event
+) -> None:
+    for line in stream:
+        output.append(line)
+        started.set()
+    # Also stops the wait if py-spy exited without printing anything
+    started.set()
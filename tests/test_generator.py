@@ -2,11 +2,13 @@ import music21
 import pytest
 from music21.stream.base import Measure, Score
 
-from piano_vision_fingering_generator.constants import TimeSignature
+from piano_vision_fingering_generator.constants import Hand, TimeSignature
 from piano_vision_fingering_generator.generator import (
+    MetronomeGetterMixin,
     MetronomeWithBoundaries,
     PianoVisionKeySignatureBuilder,
     PianoVisionMeasureBuilder,
+    PianoVisionSongBuilder,
     PianoVisionSongLengthBuilder,
     PianoVisionSupportingTracksBuilder,
     PianoVisionTempoBuilder,
@@ -100,6 +102,55 @@ def test_metronome_with_boundaries():
     assert not boundaries.in_bounds(15)
 
 
+def test_get_metronome_for_offset(basic_score: music21.stream.Score):
+    right_hand_part = basic_score.parts[0]
+    right_hand_part.insert(4, music21.tempo.MetronomeMark(number=60))
+    mixin = MetronomeGetterMixin(m21_song=basic_score)
+    assert mixin.right_metronome_tempos == [104, 60]
+
+    assert mixin.get_metronome_for_offset(0, Hand.RIGHT).tempo == 104
+    assert mixin.get_metronome_for_offset(2.5, Hand.RIGHT).tempo == 104
+    # A boundary offset belongs to the earlier metronome
+    assert mixin.get_metronome_for_offset(4, Hand.RIGHT).tempo == 104
+    assert mixin.get_metronome_for_offset(4.5, Hand.RIGHT).tempo == 60
+    with pytest.raises(ValueError):
+        mixin.get_metronome_for_offset(100, Hand.RIGHT)
+
+
+def test_seconds_between(basic_score: music21.stream.Score):
+    right_hand_part = basic_score.parts[0]
+    right_hand_part.insert(4, music21.tempo.MetronomeMark(number=60))
+    mixin = MetronomeGetterMixin(m21_song=basic_score)
+    for measure_data in right_hand_part.secondsMap:
+        measure = measure_data["element"]
+        if not isinstance(measure, music21.stream.Measure):
+            continue
+        start = measure.offset
+        end = start + measure.duration.quarterLength
+        assert (
+            mixin.seconds_between(0, start, Hand.RIGHT)
+            == (measure_data["offsetSeconds"])
+        )
+        assert (
+            mixin.seconds_between(start, end, Hand.RIGHT)
+            == (measure_data["durationSeconds"])
+        )
+
+
+def test_shared_metronomes(basic_score: music21.stream.Score):
+    right_hand_part = basic_score.parts[0]
+    metronomes = MetronomeGetterMixin.metronomes_for_part(right_hand_part)
+    mixin = MetronomeGetterMixin(m21_song=basic_score, right_hand_metronomes=metronomes)
+    assert mixin.right_hand_metronomes is metronomes
+    assert mixin.get_metronome_for_offset(2, Hand.RIGHT) is metronomes[0]
+
+    mixin = MetronomeGetterMixin(m21_song=basic_score, left_hand_metronomes=[])
+    assert mixin.left_hand_metronomes == []
+    assert mixin.right_hand_metronomes == MetronomeGetterMixin.metronomes_for_part(
+        right_hand_part
+    )
+
+
 def test_tempo_builder(basic_score: music21.stream.Score):
     builder = PianoVisionTempoBuilder(m21_song=basic_score)
     tempos = builder.build()
@@ -125,6 +176,22 @@ def test_measure_builder(basic_score: music21.stream.Score):
     assert len(measures.left) == 4
 
 
+def test_measure_builder_chord_without_fingerings(basic_score: music21.stream.Score):
+    SongTimeSignatureFixer(m21_song=basic_score).run()
+    measure = basic_score.parts[0].getElementsByClass(Measure).first()
+    chord = music21.chord.Chord(["C4", "E4", "G4"])
+    chord.articulations.append(music21.articulations.Fingering(1))
+    measure.insert(1, chord)
+    builder = PianoVisionMeasureBuilder(m21_song=basic_score)
+    notes = builder.build().right[0].notes
+    chord_notes = [note for note in notes if note.note in (64, 67)]
+    # Notes beyond the chord's fingerings are kept, without a finger
+    assert [note.finger for note in chord_notes] == [None, None]
+    assert {note.ticks_start for note in chord_notes} == {480}
+    # The chord's notes are not moved to the chord's offset
+    assert [note.offset for note in chord.notes] == [0, 0, 0]
+
+
 def test_supporting_tracks_builder(basic_score: music21.stream.Score):
     builder = PianoVisionSupportingTracksBuilder(m21_song=basic_score)
     tracks = builder.build()
@@ -152,3 +219,22 @@ def test_song_length_builder(basic_score: music21.stream.Score):
 #     song = builder.build()
 #     assert song.name == builder.song_name
 #     assert song.artist == builder.song_author
+
+
+def test_song_builder_with_parsed_score(basic_score: music21.stream.Score, tmp_path):
+    midi_path = tmp_path / "basic_score.mid"
+    basic_score.write("midi", fp=midi_path)
+    score = music21.converter.parse(midi_path)
+    builder = PianoVisionSongBuilder(m21_song=score, midi_path=midi_path)
+    assert builder.m21_song is score
+    song = builder.build()
+    assert (
+        song.tracks_v2 == PianoVisionSongBuilder(midi_path=midi_path).build().tracks_v2
+    )
+
+
+def test_song_builder_build_parallel(basic_score: music21.stream.Score, tmp_path):
+    midi_path = tmp_path / "basic_score.mid"
+    basic_score.write("midi", fp=midi_path)
+    song = PianoVisionSongBuilder(midi_path=midi_path).build_parallel()
+    assert song == PianoVisionSongBuilder(midi_path=midi_path).build()
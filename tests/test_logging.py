@@ -0,0 +1,22 @@
+import subprocess
+import sys
+
+LOG_AFTER_BASIC_CONFIG = """\
+import logging
+
+import piano_vision_fingering_generator
+
+logging.basicConfig()
+logging.getLogger("piano_vision_fingering_generator.generator").info("logged once")
+"""
+
+
+def test_package_records_are_not_repeated_by_root():
+    result = subprocess.run(
+        [sys.executable, "-c", LOG_AFTER_BASIC_CONFIG],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout == ""
+    assert result.stderr.count("logged once") == 1
@@ -1,4 +1,5 @@
 import pytest
+import yaml
 
 from piano_vision_fingering_generator.constants import Direction, Hand, TimeSignature
 from piano_vision_fingering_generator.models import (
@@ -22,32 +23,10 @@ from piano_vision_fingering_generator.models import (
 )
 
 
-def test_string_to_hand():
-    # Right hand
-    assert string_to_hand("r") == Hand.RIGHT
-    assert string_to_hand("right") == Hand.RIGHT
-    assert string_to_hand("righthand") == Hand.RIGHT
-    assert string_to_hand("right_hand") == Hand.RIGHT
-
-    # Left hand
-    assert string_to_hand("l") == Hand.LEFT
-    assert string_to_hand("left") == Hand.LEFT
-    assert string_to_hand("lefthand") == Hand.LEFT
-    assert string_to_hand("left_hand") == Hand.LEFT
-
-    # Invalid
-    with pytest.raises(ValueError):
-        string_to_hand("invalid")
-
-
-def test_rest_model():
-    rest = Rest(time=1.0, noteLengthType=NoteLengthType.QUARTER)
-    assert rest.time == 1.0
-    assert rest.noteLengthType == NoteLengthType.QUARTER
-
-
-def test_note_model():
-    note = Note(
+# Validated once per module and shared, the tests only read them
+@pytest.fixture(scope="module")
+def note() -> Note:
+    return Note(
         note=60,
         durationTicks=480,
         noteOffVelocity=64,
@@ -67,6 +46,53 @@ def test_note_model():
         id="r1",
         finger=Finger.THUMB,
     )
+
+
+@pytest.fixture(scope="module")
+def measure(note: Note) -> PianoVisionMeasure:
+    return PianoVisionMeasure(
+        direction=Direction.UP,
+        time=0.0,
+        timeEnd=1.0,
+        timeSignature=TimeSignature.FOUR_FOUR,
+        notes=[note],
+        min=60,
+        max=72,
+        measureTicksStart=0.0,
+        measureTicksEnd=480.0,
+        rests=[],
+    )
+
+
+@pytest.mark.parametrize(
+    "hand, expected",
+    [
+        ("r", Hand.RIGHT),
+        ("right", Hand.RIGHT),
+        ("righthand", Hand.RIGHT),
+        ("right_hand", Hand.RIGHT),
+        ("l", Hand.LEFT),
+        ("left", Hand.LEFT),
+        ("lefthand", Hand.LEFT),
+        ("left_hand", Hand.LEFT),
+    ],
+)
+def test_string_to_hand(hand: str, expected: Hand):
+    assert string_to_hand(hand) == expected
+
+
+def test_string_to_hand_invalid():
+    with pytest.raises(ValueError):
+        string_to_hand("invalid")
+
+
+def test_rest_model():
+    rest = Rest(time=1.0, noteLengthType=NoteLengthType.QUARTER)
+    assert rest.time == 1.0
+    assert rest.noteLengthType == NoteLengthType.QUARTER
+
+
+def test_note_model(note: Note):
     assert note.note == 60
     assert note.duration_ticks == 480
     assert note.note_off_velocity == 64
@@ -85,41 +111,12 @@ def test_note_model():
     assert note.note_measure_ind == 1
     assert note.id == "r1"
     assert note.finger == Finger.THUMB.value
+    assert note.simple_yaml() == yaml.safe_dump(note.simple_json())
+    flat_note = note.model_copy(update={"note_name": "B-3", "finger": None})
+    assert flat_note.simple_yaml() == yaml.safe_dump(flat_note.simple_json())
 
 
-def test_piano_vision_measure_model():
-    note = Note(
-        note=60,
-        durationTicks=480,
-        noteOffVelocity=64,
-        ticksStart=0,
-        velocity=0.8,
-        measureBars=1.0,
-        duration=1.0,
-        noteName="C4",
-        octave=4,
-        notePitch="C",
-        start=0.0,
-        end=1.0,
-        noteLengthType=NoteLengthType.QUARTER,
-        group=1,
-        measureInd=1,
-        noteMeasureInd=1,
-        id="r1",
-        finger=Finger.THUMB,
-    )
-    measure = PianoVisionMeasure(
-        direction=Direction.UP,
-        time=0.0,
-        timeEnd=1.0,
-        timeSignature=TimeSignature.FOUR_FOUR,
-        notes=[note],
-        min=60,
-        max=72,
-        measureTicksStart=0.0,
-        measureTicksEnd=480.0,
-        rests=[],
-    )
+def test_piano_vision_measure_model(note: Note, measure: PianoVisionMeasure):
     assert measure.direction == Direction.UP
     assert measure.time == 0.0
     assert measure.time_end == 1.0
@@ -131,54 +128,72 @@ def test_piano_vision_measure_model():
     assert measure.measure_ticks_end == 480.0
     assert measure.rests == []
     assert measure.note_count == 1
-
-
-def test_tracks_v2_model():
-    note = Note(
-        note=60,
-        durationTicks=480,
-        noteOffVelocity=64,
-        ticksStart=0,
-        velocity=0.8,
-        measureBars=1.0,
-        duration=1.0,
-        noteName="C4",
-        octave=4,
-        notePitch="C",
-        start=0.0,
-        end=1.0,
-        noteLengthType=NoteLengthType.QUARTER,
-        group=1,
-        measureInd=1,
-        noteMeasureInd=1,
-        id="r1",
-        finger=Finger.THUMB,
-    )
-    measure = PianoVisionMeasure(
-        direction=Direction.UP,
+    assert measure.to_measure() == Measure(
         time=0.0,
-        timeEnd=1.0,
         timeSignature=TimeSignature.FOUR_FOUR,
-        notes=[note],
-        min=60,
-        max=72,
-        measureTicksStart=0.0,
-        measureTicksEnd=480.0,
-        rests=[],
+        ticksPerMeasure=480,
+        ticksStart=0.0,
+        totalTicks=480.0,
+        type=2,
     )
+
+
+def test_tracks_v2_model(note: Note, measure: PianoVisionMeasure):
     tracks = TracksV2(right=[measure], left=[measure])
     assert tracks.right == [measure]
     assert tracks.left == [measure]
     assert tracks.all_notes == [note, note]
+    assert list(tracks.iter_all_notes()) == [note, note]
     assert tracks.right_notes == [note]
     assert tracks.left_notes == [note]
     assert tracks["right"] == [measure]
     assert tracks["left"] == [measure]
+    assert tracks[Hand.LEFT] is tracks.left
     assert tracks.get_note_by_id("right", 1) == note
+    assert tracks.get_note_by_id("right", 2) is None
     assert tracks.get_number_of_measures("right") == 1
     assert tracks.get_number_of_notes("right") == 1
 
 
+def test_tracks_v2_note_lists_follow_changes(note: Note, measure: PianoVisionMeasure):
+    tracks = TracksV2(right=[measure], left=[])
+    assert tracks.right_notes == [note]
+    tracks.right_notes.clear()
+    assert tracks.right_notes == [note]
+
+    tracks.right.append(measure)
+    assert tracks.right_notes == [note, note]
+    assert tracks.get_number_of_notes("right") == 2
+    assert tracks.all_notes == [note, note]
+
+    emptied = tracks.model_copy(update={"right": []})
+    assert emptied.right_notes == []
+    assert emptied.all_notes == []
+
+
+def test_tracks_v2_note_by_id_follows_changes(note: Note, measure: PianoVisionMeasure):
+    tracks = TracksV2(right=[measure], left=[])
+    assert tracks.get_note_by_id("r", 1) == note
+
+    emptied = tracks.model_copy(update={"right": []})
+    assert emptied.get_note_by_id("r", 1) is None
+    assert tracks.get_note_by_id("r", 1) == note
+
+    second = note.model_copy(update={"id": "r2"})
+    tracks.right.append(measure.model_copy(update={"notes": [second]}))
+    assert tracks.get_note_by_id("r", 2) == second
+
+    replaced = tracks.right[1]
+    replacement = note.model_copy(update={"id": "r3"})
+    replaced.notes[0] = replacement
+    assert tracks.get_note_by_id("r", 2) is None
+    assert tracks.get_note_by_id("r", 3) is replacement
+
+    replacement.id = "r4"
+    assert tracks.get_note_by_id("r", 3) is None
+    assert tracks.get_note_by_id("r", 4) is replacement
+
+
 def test_tempo_model():
     tempo = Tempo(bpm=120.0, ticks=480, time=0.0)
     assert tempo.bpm == 120.0
@@ -267,41 +282,9 @@ def test_piano_vision_time_signature_model():
     assert time_signature.measures == 4
 
 
-def test_piano_vision_song_model():
+def test_piano_vision_song_model(measure: PianoVisionMeasure):
     midi = SupportingTrackMidi(midi=60, time=0.0, velocity=0.8, duration=1.0)
     track = SupportingTrack(notes=[midi], myInstrument=1, theirInstrument=2)
-    note = Note(
-        note=60,
-        durationTicks=480,
-        noteOffVelocity=64,
-        ticksStart=0,
-        velocity=0.8,
-        measureBars=1.0,
-        duration=1.0,
-        noteName="C4",
-        octave=4,
-        notePitch="C",
-        start=0.0,
-        end=1.0,
-        noteLengthType=NoteLengthType.QUARTER,
-        group=1,
-        measureInd=1,
-        noteMeasureInd=1,
-        id="r1",
-        finger=Finger.THUMB,
-    )
-    measure = PianoVisionMeasure(
-        direction=Direction.UP,
-        time=0.0,
-        timeEnd=1.0,
-        timeSignature=TimeSignature.FOUR_FOUR,
-        notes=[note],
-        min=60,
-        max=72,
-        measureTicksStart=0.0,
-        measureTicksEnd=480.0,
-        rests=[],
-    )
     tracks = TracksV2(right=[measure], left=[measure])
     tempo = Tempo(bpm=120.0, ticks=480, time=0.0)
     key_signature = KeySignature(key="C", scale="major", ticks=0)
@@ -365,3 +348,7 @@ def test_piano_vision_song_model():
     assert song.position_groups == [position_group]
     assert song.technical_groups == [technical_group]
     assert song.max_simplification == 2
+    assert song.to_json_bytes(indent=2) == (
+        song.model_dump_json(by_alias=True, indent=2).encode()
+    )
+    assert PianoVisionSong.model_validate_json(song.to_json_bytes()) == song
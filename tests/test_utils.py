@@ -0,0 +1,77 @@
+import os
+import sys
+import threading
+
+import pytest
+
+from piano_vision_fingering_generator.utils import profile
+
+
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+def test_profile_disabled():
+    assert profile(add, enabled=False) is add
+    assert profile(enabled=False)(add) is add
+
+
+def test_profile_factory(capsys):
+    profiled = profile(sampler="cprofile")(add)
+    assert profiled is not add
+    assert profiled.__name__ == "add"
+    assert profiled(1, 2) == 3
+    assert "function calls" in capsys.readouterr().out
+
+
+def test_profile_unknown_sampler():
+    with pytest.raises(ValueError, match="Unknown sampler"):
+        profile(add, sampler="perf")
+    with pytest.raises(ValueError, match="Unknown sampler"):
+        profile(sampler="perf")(add)
+
+
+def test_profile_py_spy_not_installed(monkeypatch):
+    monkeypatch.setattr("shutil.which", lambda name: None)
+    with pytest.raises(ValueError, match="py-spy"):
+        profile(add, sampler="py-spy")
+
+
+FAKE_PY_SPY = """\
+import signal, sys, time
+
+output = sys.argv[sys.argv.index("--output") + 1]
+
+
+def stop(signum, frame):
+    with open(output, "w") as svg:
+        svg.write("<svg/>")
+    sys.exit(0)
+
+
+signal.signal(signal.SIGINT, stop)
+print("py-spy> Sampling process 100 times a second. Press Control-C to exit.")
+sys.stdout.flush()
+while True:
+    time.sleep(0.01)
+"""
+
+
+def test_profile_py_spy(monkeypatch, tmp_path):
+    # Stands in for py-spy, which prints its startup line to stdout only
+    fake_py_spy = tmp_path / "py-spy"
+    fake_py_spy.write_text(f"#!{sys.executable}\n{FAKE_PY_SPY}")
+    fake_py_spy.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.chdir(tmp_path)
+
+    result = []
+    call = threading.Thread(
+        target=lambda: result.append(profile(add, sampler="py-spy")(1, 2)),
+        daemon=True,
+    )
+    call.start()
+    call.join(timeout=30)
+    assert not call.is_alive()
+    assert result == [3]
+    assert (tmp_path / "add.svg").read_text() == "<svg/>"